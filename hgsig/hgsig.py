@@ -1,15 +1,17 @@
 """
 Differential Representation Testing
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Union
 import numpy as np
 import numpy.typing as npt
-from tqdm import tqdm
 
 from .utils import (
     chisquare_test,
     fishers_test,
     hypergeom_test,
+    hypergeom_test_batch,
+    label_histogram,
     percent_change,
     false_discovery_rate)
 
@@ -39,10 +41,10 @@ class HGSig:
 
     Attributes
     ----------
-    clusters: npt.NDArray[np.object_]
-        The provided clusters
-    groups: npt.NDArray[np.object_]
-        The provided groups
+    clusters: npt.NDArray[np.int32]
+        The provided clusters as integer category codes into `c_unique`
+    groups: npt.NDArray[np.int32]
+        The provided groups as integer category codes into `g_unique`
     reference: npt.NDArray[np.object_]
         The provided references
     method: str
@@ -91,38 +93,40 @@ class HGSig:
         self._initialize_references()
         self._validate_method()
 
-        self.pval_mat = np.zeros_like(self.distributions)
-        self.pcc_mat = np.zeros_like(self.distributions)
-        self.qval_mat = np.zeros_like(self.distributions)
-        self.nlf_mat = np.zeros_like(self.distributions)
-        self.snlf_mat = np.zeros_like(self.distributions)
+        self.pval_mat = None
+        self.pcc_mat = None
+        self.qval_mat = None
+        self.nlf_mat = None
+        self.snlf_mat = None
 
     def _build_unique(self):
         """
-        determines the unique group and cluster names and their respective
-        counts
+        determines the unique group and cluster names and their
+        respective counts, and recodes the observation arrays to
+        int32 category codes
         """
-        self.c_unique, self.c_counts = np.unique(
-                self.clusters, return_counts=True)
-        self.g_unique, self.g_counts = np.unique(
-                self.groups, return_counts=True)
+        self.c_unique, c_inverse, self.c_counts = np.unique(
+                self.clusters, return_inverse=True, return_counts=True)
+        self.g_unique, g_inverse, self.g_counts = np.unique(
+                self.groups, return_inverse=True, return_counts=True)
+        self.clusters = c_inverse.astype(np.int32)
+        self.groups = g_inverse.astype(np.int32)
+        self.g_pos = {group: idx for idx, group in enumerate(self.g_unique)}
 
     def _validate_inputs(self):
         """
         validates that the inputs are in the expected format
         """
-        c_total: int = self.c_counts.sum()
-        g_total: int = self.g_counts.sum()
-
-        if c_total != g_total:
+        if self.clusters.size != self.groups.size:
             raise ValueError(
-                    f"Provided inputs are different sizes: {c_total} != {g_total}")
+                    f"Provided inputs are different sizes: "
+                    f"{self.clusters.size} != {self.groups.size}")
 
         if len(self.clusters) <= 1:
             raise ValueError(
                     "Provided inputs must contain more than 2 observations")
 
-        if not np.all(np.isin(self.reference, self.g_unique)):
+        if not all(ref in self.g_pos for ref in np.atleast_1d(self.reference)):
             raise ValueError(
                     f"Provided reference ({self.reference}) not in provided groups")
 
@@ -153,19 +157,20 @@ class HGSig:
         """
         sets the reference index
         """
-        self.ref_idx = np.flatnonzero(np.isin(self.g_unique, self.reference))
+        self.ref_idx = np.fromiter(
+                (self.g_pos[ref] for ref in np.atleast_1d(self.reference)),
+                dtype=np.intp)
 
     def _initialize_distributions(self):
         """
         calculates the cluster representation of each cluster~group
+        as a contingency table over the integer-encoded labels
         """
-        self.distributions = np.zeros((self.g_unique.size, self.c_unique.size))
-        for idx, group in tqdm(enumerate(self.g_unique), desc="Calculating Distributions"):
-            self.distributions[idx] = np.array([
-                np.sum(
-                    (self.clusters == cluster) &
-                    (self.groups == group))
-                for cluster in self.c_unique])
+        self.distributions = label_histogram(
+                self.groups,
+                self.clusters,
+                self.g_unique.size,
+                self.c_unique.size).astype(np.int32)
 
     def _initialize_references(self):
         """
@@ -193,58 +198,74 @@ class HGSig:
                 {', '.join(self.methods.keys())}
                 """)
 
-        if self.method == "hypergeom":
-            for dist in self.distributions:
-                if np.any(dist > self.ref_dist):
-                    raise ValueError(
-                        """
-                        Cannot perform hypergeometric testing as one or more test
-                        distributions contain values higher than in the reference
-                        distributions. Please increase the size of the reference
-                        dataset or rerun the tool with `method=fishers`
-                        """)
-
-    def fit(self):
+        if self.method == "hypergeom" and np.any(self.distributions > self.ref_dist):
+            raise ValueError(
+                """
+                Cannot perform hypergeometric testing as one or more test
+                distributions contain values higher than in the reference
+                distributions. Please increase the size of the reference
+                dataset or rerun the tool with `method=fishers`
+                """)
+
+    def fit(self, threads: int = 1):
         """
         Performs the differential representation testing
-        """
-        self.pval_mat = np.zeros_like(self.distributions)
-        self.pcc_mat = np.zeros_like(self.distributions)
-
-        for idx, dist in tqdm(enumerate(self.distributions), desc="Calculating Significance"):
 
-            # calculate the significance
-            self.pval_mat[idx] = self.methods[self.method](
-                    r_draw=self.ref_dist,
-                    t_draw=dist)
+        Parameters
+        ----------
+        threads: int
+            the number of threads to split the hypergeometric testing
+            across. The tail evaluations release the GIL so row chunks
+            can be processed concurrently
+        """
+        self.pcc_mat = percent_change(
+                self.ref_dist,
+                self.distributions).astype(np.float32)
 
-            # calculate the percent change
-            self.pcc_mat[idx] = percent_change(
-                    self.ref_dist,
-                    dist)
+        if self.method == "hypergeom":
+            if threads > 1:
+                chunks = np.array_split(self.distributions, threads)
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    pvals = list(pool.map(
+                        lambda chunk: hypergeom_test_batch(
+                            self.ref_dist, chunk),
+                        chunks))
+                self.pval_mat = np.concatenate(pvals).astype(np.float32)
+            else:
+                self.pval_mat = hypergeom_test_batch(
+                        self.ref_dist,
+                        self.distributions).astype(np.float32)
+        else:
+            self.pval_mat = np.zeros(self.distributions.shape, dtype=np.float32)
+            for idx, dist in enumerate(self.distributions):
+                self.pval_mat[idx] = self.methods[self.method](
+                        r_draw=self.ref_dist,
+                        t_draw=dist)
 
         self.qval_mat = self._calculate_fdr()
-        self.nlf_mat = self._calculate_nlf()
-        self.snlf_mat = self._calculate_snlf()
+        self.nlf_mat, self.snlf_mat = self._calculate_log_transforms()
         self._isfit = True
 
     def _calculate_fdr(self) -> npt.NDArray[np.float64]:
         """
         calculates the false discovery rate
         """
-        return false_discovery_rate(self.pval_mat)
-
-    def _calculate_nlf(self) -> npt.NDArray[np.float64]:
-        """
-        calculates the negative log false discovery rate
-        """
-        return -np.log10(self.qval_mat)
+        return false_discovery_rate(self.pval_mat).astype(np.float32)
 
-    def _calculate_snlf(self) -> npt.NDArray[np.float64]:
+    def _calculate_log_transforms(self) -> npt.NDArray[np.float64]:
         """
-        calculates the signed negative log false discovery rate
+        calculates the negative log false discovery rate and its
+        percent-change signed variant in a single pass. q-values that
+        underflow to zero are clipped to the smallest representable
+        float so the logs stay finite
         """
-        return np.sign(self.pcc_mat) * self.nlf_mat
+        qval = np.maximum(
+                self.qval_mat,
+                np.finfo(self.qval_mat.dtype).tiny)
+        nlf = -np.log10(qval)
+        snlf = np.sign(self.pcc_mat)
+        snlf *= nlf
+        return nlf, snlf
 
     def get_pval(self) -> npt.NDArray[np.float64]:
         """
@@ -19,9 +19,8 @@ def _filter_significant(
     expressed clusters/guides
     """
     values = hgs.get_pval() if use_pval else hgs.get_qval()
-    min_sig = values.min(axis=1)
-    mask = min_sig < threshold
-    return mat.iloc[mask]
+    mask = (values < threshold).any(axis=1)
+    return mat.loc[mask]
 
 
 def plot_hgsig(
@@ -8,6 +8,57 @@ from scipy.stats import (
     fisher_exact,
     chi2_contingency)
 
+try:
+    from scipy.stats import false_discovery_control
+except ImportError:
+    false_discovery_control = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _hist2d(
+            g_inv: np.ndarray,
+            c_inv: np.ndarray,
+            num_g: int,
+            num_c: int) -> np.ndarray:
+        out = np.zeros((num_g, num_c), dtype=np.int64)
+        for i in range(g_inv.size):
+            out[g_inv[i], c_inv[i]] += 1
+        return out
+
+
+def label_histogram(
+        g_inv: np.ndarray,
+        c_inv: np.ndarray,
+        num_g: int,
+        num_c: int) -> np.ndarray:
+    """
+    builds the (group, cluster) contingency table from the
+    integer-encoded labels. Uses a jit-compiled histogram kernel
+    when numba is available and a flat bincount otherwise.
+
+    inputs:
+        g_inv: np.ndarray
+            the integer-encoded group of each observation
+        c_inv: np.ndarray
+            the integer-encoded cluster of each observation
+        num_g: int
+            the number of unique groups
+        num_c: int
+            the number of unique clusters
+    """
+    if njit is not None:
+        return _hist2d(g_inv, c_inv, num_g, num_c)
+    return np.bincount(
+            g_inv * num_c + c_inv,
+            minlength=num_g * num_c)\
+        .reshape(num_g, num_c)
+
 
 def hypergeom_test(
         r_draw: np.ndarray,
@@ -28,28 +79,65 @@ def hypergeom_test(
             the reference draw
         t_draw : np.ndarray
             the test draw
-        overrep : bool
-            Whether to specifically test for overrepresentation.
-            Otherwise will test for underrepresentation.
     """
     assert r_draw.size == t_draw.size
     if not np.all(r_draw >= t_draw):
         raise ValueError(
                 "Some values are larger in the test draw than in the reference")
-    if np.all(r_draw == t_draw):
-        return np.ones_like(r_draw)
 
     param_M = r_draw.sum()
     param_n = r_draw
     param_N = t_draw.sum()
     param_k = t_draw
 
+    if param_M == param_N and np.array_equal(r_draw, t_draw):
+        return np.ones_like(r_draw)
+
     pval_high = hypergeom.sf(param_k, M=param_M, n=param_n, N=param_N)
     pval_low = hypergeom.cdf(param_k, M=param_M, n=param_n, N=param_N)
 
     return multidim_min(pval_high, pval_low)
 
 
+def hypergeom_test_batch(
+        r_draw: np.ndarray,
+        t_draws: np.ndarray) -> np.ndarray:
+    """
+    performs the hypergeometric representation test for all test
+    distributions in a single broadcasted call.
+
+    M : total number of observations in reference
+    n : number of observations in a specific category in reference
+    N : number of draws (aka total number of observations in each test)
+    k : number of observations in a specific category in each test
+
+    inputs:
+        r_draw : np.ndarray
+            the reference draw
+        t_draws : np.ndarray
+            the test draws as a (groups, clusters) matrix
+    """
+    assert r_draw.size == t_draws.shape[1]
+    if not np.all(r_draw >= t_draws):
+        raise ValueError(
+                "Some values are larger in the test draws than in the reference")
+
+    param_M = r_draw.sum()
+    param_n = r_draw[None, :]
+    param_N = t_draws.sum(axis=1, keepdims=True)
+    param_k = t_draws
+
+    # freeze the distribution so the broadcast parameters are only
+    # validated once across the two tail evaluations
+    rv = hypergeom(M=param_M, n=param_n, N=param_N)
+    pval_high = rv.sf(param_k)
+    pval_low = rv.cdf(param_k)
+
+    pval = np.minimum(pval_high, pval_low)
+    pval[np.all(t_draws == r_draw, axis=1)] = 1.
+    return pval
+
+
 def exact_test(
         r_draw: np.ndarray,
         t_draw: np.ndarray,
@@ -93,10 +181,38 @@ def fishers_test(
     performs significance testing between cluster
     representations as a fishers exact test.
 
+    Evaluated as the hypergeometric tails of each 2x2 contingency
+    table so all clusters are tested in a single vectorized call.
+
     M : total number of observations in reference
     N : total number of observations in test
     """
-    return exact_test(r_draw, t_draw, fisher_exact) 
+    assert r_draw.size == t_draw.size
+
+    # fractional draws occur under mean/median reference aggregation;
+    # truncate to integer counts as scipy.stats.fisher_exact does since
+    # the hypergeometric tails are undefined for non-integer parameters
+    r_draw = np.asarray(r_draw, dtype=np.int64)
+    t_draw = np.asarray(t_draw, dtype=np.int64)
+
+    param_M = r_draw.sum()
+    param_N = t_draw.sum()
+
+    if param_M == param_N and np.array_equal(r_draw, t_draw):
+        return np.ones_like(r_draw)
+
+    pval_high = hypergeom.sf(
+            t_draw - 1,
+            M=param_M + param_N,
+            n=r_draw + t_draw,
+            N=param_N)
+    pval_low = hypergeom.cdf(
+            t_draw,
+            M=param_M + param_N,
+            n=r_draw + t_draw,
+            N=param_N)
+
+    return multidim_min(pval_high, pval_low)
 
 
 def chisquare_test(
@@ -119,8 +235,7 @@ def multidim_min(
     takes the minimum value between two arrays of equal size
     """
     assert x.size == y.size
-    mat = np.vstack([x, y])
-    return np.min(mat, axis=0)
+    return np.minimum(x, y)
 
 
 def percent_change(
@@ -128,21 +243,28 @@ def percent_change(
         t_draw: np.ndarray) -> np.ndarray:
     """
     calculates the percent change between a reference group
-    and a test group. Will first normalize the vectors so that
-    their total will sum to 1
+    and one or more test groups. Will first normalize the vectors
+    so that their total will sum to 1. `t_draw` may be a
+    (groups, clusters) matrix; the reference normalization is
+    computed once and broadcast across the rows
     """
-    assert r_draw.size == t_draw.size
+    assert r_draw.size == t_draw.shape[-1]
     r_norm = r_draw / r_draw.sum()
-    t_norm = t_draw / t_draw.sum()
+    t_norm = t_draw / t_draw.sum(axis=-1, keepdims=True)
     return (t_norm - r_norm) / r_norm
 
 
 def false_discovery_rate(
         pval: np.ndarray) -> np.ndarray:
     """
-    converts the pvalues into false discovery rate q-values
+    converts the pvalues into false discovery rate q-values.
+    Delegates to `scipy.stats.false_discovery_control` when available
+    (SciPy >= 1.11) and falls back to the local BH implementation
     """
     dim = pval.shape
+    if false_discovery_control is not None:
+        return false_discovery_control(
+                pval, axis=None, method="bh").reshape(dim)
     qval = p_adjust_bh(pval.ravel())
     return qval.reshape(dim)
 
@@ -153,10 +275,11 @@ def p_adjust_bh(
     Benjamini-Hochberg p-value correction for multiple hypothesis testing.
     https://stackoverflow.com/a/33532498
     """
-    p = np.asfarray(p)
-    by_descend = p.argsort()[::-1]
-    by_orig = by_descend.argsort()
-    steps = float(len(p)) / np.arange(len(p), 0, -1)
-    q = np.minimum(1, np.minimum.accumulate(steps * p[by_descend]))
-    return q[by_orig]
+    p = np.asarray(p, dtype=np.float64)
+    order = np.argsort(p)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(p.size)
+    scaled = p[order] * p.size / np.arange(1, p.size + 1)
+    q = np.minimum.accumulate(scaled[::-1])[::-1]
+    return np.minimum(q, 1)[ranks]
 